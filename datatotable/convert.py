@@ -52,7 +52,8 @@ def values_to_foreign_key(session, foreign_tbl, foreign_key, foreign_value, chil
                 conversion_keys.append([child_data[k][i] for k in child_data.keys()])
             return [nested_conversion_dict[k] for k in conversion_keys]
         else:
-            conversion_dict = {getattr(row, foreign_value): getattr(row, foreign_key) for row in rows}
+            # Rows are (foreign_key, foreign_value) tuples; unpacking them avoids two attribute lookups per row
+            conversion_dict = {value: key for key, value in rows}
             return [conversion_dict[i] for i in child_data]
 
 
@@ -75,5 +76,5 @@ def _values_to_foreign_key(session, foreign_subquery, foreign_key, foreign_value
     """
     rows = session.query(getattr(foreign_subquery.c, foreign_key), getattr(foreign_subquery.c, foreign_value)). \
         filter(getattr(foreign_subquery.c, foreign_value).in_(child_data)).all()
-    conversion_dict = {getattr(row, foreign_value): getattr(row, foreign_key) for row in rows}
+    conversion_dict = {value: key for key, value in rows}  # Rows are (foreign_key, foreign_value) tuples
     return conversion_dict
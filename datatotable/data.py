@@ -3,14 +3,74 @@ Data holds the DataOperator class which coerces raw_data into SQLalchemy compati
 """
 from sqlalchemy import Integer, Float, String, DateTime, Boolean, Date
 from datatotable import typecheck
+from collections.abc import Mapping
 from datetime import datetime, date
-import pandas
+from functools import cached_property
+from itertools import repeat
+from operator import itemgetter
+import numpy
+import sys
+
+# Python types implied by a numpy dtype kind; these columns never need their values inspected
+_KIND_TO_PY_TYPE = {"i": int, "u": int, "f": float, "b": bool}
+# Values which may begin a column numpy can store with a native dtype
+_NUMERIC_TYPES = (int, float, numpy.number, numpy.bool_)
+# SQL types for each python type and its string tag
+_PY_TO_SQL_TYPE = {int: Integer, "integer": Integer, float: Float, "float": Float, str: String, "string": String,
+                   datetime: DateTime, "datetime": DateTime, date: Date, "date": Date, bool: Boolean, "bool": Boolean}
+
+
+def _numeric_kinds(cls):
+    """Return the numpy dtype kinds that hold values of cls exactly, or an empty string if cls is not a number."""
+    if issubclass(cls, (bool, numpy.bool_)):
+        return "b"
+    elif issubclass(cls, (int, numpy.integer)):
+        return "iu"
+    elif issubclass(cls, (float, numpy.floating)):
+        return "f"
+    return ""
+
+
+def _to_array(values):
+    """Return a column of values as a numpy array.
+
+    Integer, float, and boolean columns keep their native dtype. datetime64 arrays are converted to datetimes, and every
+    other column is stored as an object array so its values are never coerced (numpy would otherwise turn [1, 'a']
+    into ['1', 'a']). Only arrays and lists that start with a number are passed to numpy to choose a dtype, so string
+    columns are not first built as a fixed width unicode array. numpy's dtype is kept only if it holds every value's
+    class exactly; lists mixing ints with floats or bools, or ints too large for int64, are stored as objects.
+    """
+    if isinstance(values, numpy.ndarray):
+        if values.dtype.kind == "M":  # datetime64 values would otherwise become integers in an object array
+            return values.astype("datetime64[us]").astype(object)
+        arr = values
+    elif isinstance(next(iter(values), None), _NUMERIC_TYPES):
+        kinds = {_numeric_kinds(cls) for cls in set(map(type, values))}
+        if len(kinds) != 1 or "" in kinds:
+            return numpy.asarray(values, dtype=object)
+        try:
+            arr = numpy.asarray(values)
+        except ValueError:  # Ragged values can only be held in an object array
+            return numpy.asarray(values, dtype=object)
+        if arr.dtype.kind not in kinds.pop():  # e.g. [2 ** 63, -1] becomes float64
+            return numpy.asarray(values, dtype=object)
+    else:
+        return numpy.asarray(values, dtype=object)
+    if arr.dtype.kind in "iufb" and arr.ndim == 1:
+        return arr
+    return numpy.asarray(values, dtype=object)
 
 
 class DataOperator:
-    """DataOperator takes scraped data in init, and uses its member functions to return manipulations of that data"""
+    """DataOperator takes scraped data in init, and uses its member functions to return manipulations of that data
+
+    The inferred column types, rows, and dataframe are computed on first access and cached. Methods that modify
+    self.data, such as fill(), clear the cache; clear_cache() must be called after modifying self.data directly.
+    """
+
+    _cached_properties = ("_sql_types", "rows", "dataframe")
 
-    def __init__(self, data):
+    def __init__(self, data, infer_sample=None):
         """Stores the data dictionary passed to it
 
         Args:
@@ -22,8 +82,14 @@ class DataOperator:
             Second, data may be a list of rows formatted as:
             data[0] = {col1: val0, col2: val0, colx: val0}
             data[x] = {col1: valx, col2: valx, colx: valx}
+            In either case, each column is stored in self.data as a numpy array.
+            infer_sample: If specified, the type of each column is inferred from its first infer_sample values and its
+            last value rather than from every value. Sampling is faster on large data, but a value of a different type
+            between the sample and the last value will not be seen. Integer, float, and boolean columns are typed by
+            their dtype and are never sampled.
         """
-        self.data = self._format_data(data)
+        self.data = {key: _to_array(values) for key, values in self._format_data(data).items()}
+        self.infer_sample = infer_sample
 
     @property
     def columns(self):
@@ -31,27 +97,48 @@ class DataOperator:
 
         Returns:
             A dictionary with the same keys as self.data. The dictionary's values are the sql_types of each key:value
-            pair in tbl_dict. The columns function with SQLalchemy as column definitions.
+            pair in tbl_dict. The columns function with SQLalchemy as column definitions. A new dictionary is returned
+            on each access so callers may append constraints to its lists without altering the cached types.
         """
-        py_types = self._get_py_type()  # py_types is a dict
-        sql_types = self._py_type_to_sql_type(py_types)
-        return sql_types
+        return {key: list(sql_type) for key, sql_type in self._sql_types.items()}
+
+    @cached_property
+    def _sql_types(self):
+        """Infer and cache the SQL type of each column in self.data."""
+        return self._infer_sql_types()
+
+    def clear_cache(self):
+        """Discard cached column types, rows, and dataframe so they are recomputed from self.data on next access."""
+        for name in self._cached_properties:
+            self.__dict__.pop(name, None)
 
     @staticmethod
     def _format_data(data):
         """Format data into a dictionary where keys are column names and values are ordered lists of values."""
-        if isinstance(data, dict):
+        if isinstance(data, Mapping):
             return data
+        # A DataFrame can only have been built if pandas is already imported, so the optional dependency is never loaded
+        pandas = sys.modules.get("pandas")
+        if pandas is not None and isinstance(data, pandas.DataFrame):
+            # Numpy numeric and datetime64 columns are kept as arrays, which _to_array converts like any other array, so
+            # datetimes are not returned as Timestamps. Other columns, including pandas' nullable dtypes, become python
+            # objects for type inference, with missing values (NA, NaN) replaced by None.
+            return {key: series.to_numpy() if isinstance(series.dtype, numpy.dtype) and series.dtype.kind in "iufbM"
+                    else series.astype(object).where(series.notna(), None).tolist() for key, series in data.items()}
         elif isinstance(data, list):
             keys = data[0].keys()
-            dict_data = {key: [] for key in keys}
-            for i in data:
-                if i.keys() == keys:
-                    for key in keys:
-                        dict_data[key].append(i[key])
-            return dict_data
+            num_keys = len(keys)
+            if not num_keys:  # itemgetter requires at least one key; rows without keys hold no columns
+                return {}
+            # itemgetter pulls each row's values in key order in C; rows with mismatched keys are skipped. Comparing
+            # lengths first rejects most mismatched rows without comparing their keys.
+            get_values = itemgetter(*keys)
+            values = [get_values(row) for row in data if len(row) == num_keys and row.keys() == keys]
+            if len(keys) == 1:  # itemgetter returns a bare value, not a tuple, for a single key
+                values = [(value,) for value in values]
+            return {key: list(column) for key, column in zip(keys, zip(*values))}
         else:
-            raise ValueError("Input data is of {} type. DataOperator only supports lists or dictionaries".
+            raise ValueError("Input data is of {} type. DataOperator only supports lists, dictionaries, or DataFrames".
                              format(type(data)))
 
     def _get_py_type(self):
@@ -60,101 +147,82 @@ class DataOperator:
         Returns:
             A dictionary formatted as key:py_type where the type can be integer, float, string, datetime, or none
         """
-        py_types_dict = {}
-        if isinstance(self.data, dict):
-            tbl_keys = list(self.data.keys())
-            py_types = [typecheck.get_type(self.data[key]) for key in tbl_keys]
-            py_types_dict = dict(zip(tbl_keys, py_types))
-        elif isinstance(self.data, list):
-            if isinstance(self.data[0], dict):
-                data = self.data[0]
-                tbl_keys = list(data.keys())
-                py_types = [typecheck.get_type(data[key]) for key in tbl_keys]
-                py_types_dict = dict(zip(tbl_keys, py_types))
-            else:
-                raise Exception("The data structure ({}) is not handled by _get_py_type".format(type(self.data)))
-        return py_types_dict
+        return {key: self._infer_column_type(column) for key, column in self.data.items()}
 
-    @staticmethod
-    def _py_type_to_sql_type(py_types):
-        """Convert and return a dictionary of python types to a dictionary of sql types.
+    def _infer_column_type(self, column):
+        """Return the python type of a column, which is a numpy array from self.data.
+
+        Homogeneous numeric columns are typed from their numpy dtype without inspecting any values. Other columns are
+        object arrays, which typecheck.get_type() types from the distinct classes of their values.
+        """
+        if column.ndim != 1 or not column.size:  # An empty list becomes a float array; keep get_type's answer
+            return typecheck.get_type(column.tolist())
+        if column.dtype.kind in _KIND_TO_PY_TYPE:
+            return _KIND_TO_PY_TYPE[column.dtype.kind]
+        return typecheck.get_type(column, sample=self.infer_sample)
+
+    def _infer_sql_types(self):
+        """Return a dictionary of sql types for self.data, inferring each column's type in a single pass.
 
         Raises:
             An exception if a py_type is not an integer, float, string, datetime, bool, or none
         """
-
         sql_types = dict()
-        for key in py_types:
-            py_type = py_types[key]
-            if py_type == "integer" or py_type is int:
-                sql_types[key] = [Integer]
-            elif py_type == "float" or py_type is float:
-                sql_types[key] = [Float]
-            elif py_type == "string" or py_type is str:
-                sql_types[key] = [String]
-            elif py_type == "datetime" or py_type is datetime:
-                sql_types[key] = [DateTime]
-            elif py_type == "date" or py_type is date:
-                sql_types[key] = [Date]
-            elif py_type == "bool" or py_type is bool:
-                sql_types[key] = [Boolean]
-            elif py_type is None:
+        for key, column in self.data.items():
+            py_type = self._infer_column_type(column)
+            if py_type is None:
                 continue  # We continue here so as to not create a column for null values
                 # ToDo: evaluate if this clause should exist. Why was it here in the first place?
-            else:
+            sql_type = _PY_TO_SQL_TYPE.get(py_type)
+            if sql_type is None:
                 raise Exception("Error: py_type {} is not an integer, float, datetime,"
-                                " none, or string".format(py_types[key]))
+                                " none, or string".format(py_type))
+            sql_types[key] = [sql_type]
         return sql_types
 
-    @property
+    @cached_property
     def rows(self):
         """Convert and return class data into rows compatible with sqlalchemy's insert function
 
-        Currently presumes each dictionary object is a list of equivalent length. Calls _dict_to_rows() to do primary
-        processing. Does not yet function with lists.
+        Currently presumes each column is of equivalent length. Calls _dict_to_rows() to do primary processing; list
+        input is already formatted into a dictionary of columns by __init__.
 
         Returns:
             a list of rows compatible with SQLalchemy's
-
-        Raise:
-            Exception: If the input is neither a list nor dictionary, an exception is raised
         """
-        if isinstance(self.data, dict):
-            return self._dict_to_rows()
-        elif isinstance(self.data, list):
-            if self._list_to_rows():
-                return self.data
-            else:
-                raise ValueError("self.data is not a properly formatted list or dictionary, and cannot be handled")
-        else:
-            raise ValueError("self.data is not a properly formatted list or dictionary, and cannot be handled")
+        return self._dict_to_rows()
 
-    def _dict_to_rows(self):
-        """Convert and return an input dictionary into rows compatible with SQLalchemy"""
+    def _dict_to_rows(self, start=0, stop=None):
+        """Convert and return the [start:stop] slice of an input dictionary into rows compatible with SQLalchemy"""
 
-        rows = []
         keys = list(self.data.keys())
         # The length of the data should be checked outside the function to ensure each value is an equal length object
-        length = len(self.data[keys[0]])
-        for i in range(length):
-            row_dict = dict()
-            for key in keys:
-                row_dict[key] = self.data[key][i]
-            rows.append(row_dict)
-        return rows
-
-    def _list_to_rows(self):
-        """Checks if self.data is in row format and returns the result as a bool"""
-        keys = self.data[0].keys()
-        for i in self.data:
-            if i.keys() == keys:
-                continue
-            else:
-                return False
-        return True
+        # zip() transposes the columns in C and stops at the shortest column. tolist() converts numpy scalars to python
+        # scalars, which the database driver can bind. Mapping dict over zip(keys, row) keeps the per-row loop in C.
+        values = zip(*(column[start:stop].tolist() for column in self.data.values()))
+        return list(map(dict, map(zip, repeat(keys), values)))
 
-    @property
+    def iter_rows(self, batch_size=10000):
+        """Yield class data as lists of at most batch_size rows compatible with sqlalchemy's insert function
+
+        Unlike rows, only one batch of row dictionaries exists at a time, so large data can be inserted without holding
+        every row in memory. Pass itertools.chain.from_iterable(data.iter_rows()) to Database.insert_rows() to insert
+        the batches as a single stream.
+
+        Args:
+            batch_size: The maximum number of rows in each yielded list
+
+        Yields:
+            lists of rows compatible with SQLalchemy's insert function
+        """
+        num_rows = min((column.size for column in self.data.values()), default=0)  # rows stops at the shortest column
+        for start in range(0, num_rows, batch_size):
+            yield self._dict_to_rows(start, start + batch_size)
+
+    @cached_property
     def dataframe(self):
+        """Return self.data as a pandas DataFrame. Requires pandas."""
+        import pandas
         try:
             return pandas.DataFrame(self.data)
         except ValueError:
@@ -167,36 +235,34 @@ class DataOperator:
              True: if all the lists in the dictionary have the same length
              False: if the dictionary's lists are of different lengths
         """
-        keys = self.data.keys()
-        lengths = []
-        for key in keys:
-            lengths.append(len(self.data[key]))
-        length_set = set(lengths)
-        if len(length_set) == 1:
-            return True
-        else:
-            return False
+        columns = iter(self.data.values())
+        first = next(columns, None)
+        if first is None:
+            return False  # No columns means no lengths to agree on
+        return all(column.size == first.size for column in columns)  # Stops at the first mismatched column
 
     def num_rows(self):
         """Return the length of the longest column in self.data"""
-        keys = self.data.keys()
-        lengths = []
-        for key in keys:
-            if self.data[key]:
-                lengths.append(len(self.data[key]))
-        return max(lengths)
+        return max((column.size for column in self.data.values()), default=0)
 
     def fill(self, key, value):
         """Fill a column, specified by key, with the specified value.
 
         Typically used to match data length to coerce a shorter column to the length of the data set as a whole."""
-        if self.data[key]:
-            column_length = len(self.data[key])
-        else:
-            column_length = 0
-        data_length = self.num_rows()
-        for i in range(column_length, data_length):
-            self.data[key].append(value)
+        column = self.data[key]
+        fill_length = self.num_rows() - column.size
+        if fill_length > 0:
+            # The filler is allocated in one call with the dtype _to_array picks for the value, rather than built from
+            # a python list of fill_length values. Sequences, such as lists or tuples, are stored whole in an object
+            # array rather than broadcast over the filler.
+            if numpy.ndim(value):
+                filler = numpy.empty(fill_length, dtype=object)
+                filler.fill(value)
+            else:
+                filler = numpy.full(fill_length, value, dtype=_to_array([value]).dtype)
+            # An empty column's dtype says nothing about its values, so it is replaced rather than extended
+            self.data[key] = numpy.concatenate([column, filler]) if column.size else filler
+            self.clear_cache()
 
 
 if __name__ == "__main__":
@@ -2,10 +2,12 @@
 This file contains a Database class which dictates table creation, deletion, and access.
 """
 
+from itertools import islice
 from pathlib import Path
 import os
+import sqlite3
 from sqlalchemy import Column, Integer, Table
-from sqlalchemy import create_engine, MetaData, event
+from sqlalchemy import create_engine, MetaData, event, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import mapper, clear_mappers
 from sqlalchemy.engine import Engine
@@ -21,17 +23,22 @@ class Database:
          engine: SQLalchemy engine for accessing the database
          metadata: Metadata for the engine, used mostly for table access / reflection
          Base: SQLalchemy declarative_base() used for table creation
+
+    Note:
+        Reflected tables and table mappings are cached until create_tables() or drop_table() modifies the database.
+        Call clear_table_cache() after changing the schema by other means.
     """
 
     class Template(object):
         """Blank template to map tables to with the sqlalchemy mapper function
 
         Note:
-            Template can only be mapped to one table at a time. Use clear_mappers to free the template for new tables
+            map_table() maps each table to its own subclass of Template, so tables can be mapped one after another
+            without calling clear_mappers in between.
         """
         pass
 
-    def __init__(self, name, directory=None):
+    def __init__(self, name, directory=None, **engine_kwargs):
         """Initialize macro-level SQLalchemy objects as class attributes (engine, metadata, base).
 
         A session will allow interaction with the DB.
@@ -39,6 +46,8 @@ class Database:
         Args:
             directory: The directory where the database is stored or will be created
             name: The name of the database
+            engine_kwargs: Additional keyword arguments passed to SQLalchemy's create_engine(), such as echo=True or,
+            on SQLalchemy 2.0+, insertmanyvalues_page_size
         """
         if directory:
             prefix = r"sqlite:///"
@@ -47,44 +56,78 @@ class Database:
         else:
             self.location = r"sqlite:///{}.db".format(name)
             self.path = os.path.join(os.getcwd(), "{}.db".format(name))
-        self.engine = create_engine(self.location)
+        self.engine = create_engine(self.location, **engine_kwargs)
+        event.listen(self.engine, "connect", set_sqlite_performance_pragmas)
+        event.listen(self.engine, "connect", disable_pysqlite_transactions)
+        event.listen(self.engine, "begin", begin_sqlite_transaction)
         self.metadata = MetaData(self.engine)
         self.Base = declarative_base()
+        self._tables = None  # Reflected tables, cached by the tables property
+        self._automap_base = None  # Automapped base, cached by the table_mappings property
         # self.Base = automap_base()
         # self.Base.prepare()
 
     @property
     def tables(self):
         """Return a dictionary of tables from the database"""
-        meta = MetaData(bind=self.engine)
-        meta.reflect(bind=self.engine)
-        return meta.tables
+        if self._tables is None:
+            meta = MetaData(bind=self.engine)
+            meta.reflect(bind=self.engine)
+            self._tables = meta.tables
+        return self._tables
+
+    def clear_table_cache(self):
+        """Discard the reflected tables and mappings so the next access to tables or table_mappings reflects again."""
+        self._tables = None
+        self._automap_base = None
 
     @property
     def table_mappings(self):
         """Find and return the specified table mappings or return all table mappings"""
-        self.metadata.reflect(self.engine)
-        Base = automap_base(metadata=self.metadata)
-        Base.prepare()
-
-        return Base.classes
+        # clear_mappers() unmaps the cached classes, so a base whose classes are no longer mapped is rebuilt
+        if self._automap_base is None or not all(map(_is_mapped, self._automap_base.classes)):
+            self.metadata.reflect(self.engine)
+            Base = automap_base(metadata=self.metadata)
+            Base.prepare()
+            self._automap_base = Base
+        return self._automap_base.classes
 
     def table_exists(self, tbl_name):
         """Check if a table exists in the database; Return True if it exists and False otherwise."""
-        if tbl_name in self.tables:
-            return True
-        else:
-            return False
+        # Asks the database about a single table instead of reflecting the whole schema
+        with self.engine.connect() as conn:
+            return self.engine.dialect.has_table(conn, tbl_name)
 
     def create_tables(self):
         """Creates all tables which have been made or modified with the Base class of the Database
 
         Note that existing tables which have been modified, such as by adding a relationship, will be updated when
-        create_tables() is called. """
-        self.metadata.create_all(self.engine)
+        create_tables() is called. All tables are created in one transaction, so there is a single commit no matter
+        how many tables are created. """
+        with self.engine.begin() as conn:
+            self.metadata.create_all(conn)
+        self.clear_table_cache()
+
+    def insert_rows(self, tbl_name, rows, batch_size=10000):
+        """Insert rows into the table named tbl_name in a single transaction.
+
+        The rows are passed to the DBAPI's executemany() in batches rather than inserted one at a time, and no ORM
+        objects are created for them. Rows may be any iterable, such as a generator; only one batch is held in memory.
+
+        Args:
+            tbl_name: The name of the table to insert into
+            rows: An iterable of dictionaries with column names as keys, such as DataOperator.rows
+            batch_size: The number of rows passed to each executemany() call
+        """
+        tbl = self.tables[tbl_name]
+        rows = iter(rows)
+        with self.engine.begin() as conn:
+            # An empty batch is never executed; it would be run as a single insert of default values
+            while batch := list(islice(rows, batch_size)):
+                conn.execute(tbl.insert(), batch)
 
     def map_table(self, tbl_name, columns, constraints=None):
-        """Map a table named tbl_name and with column_types to Template, add constraints if specified.
+        """Map a table named tbl_name and with column_types to a subclass of Template, add constraints if specified.
 
         Note: Foreign key constraints should likely be added to the mapped table explicitly rather than in this function.
 
@@ -97,6 +140,9 @@ class Database:
             columns: A dictionary with column names as keys and sql types as values
             constraints: A dictionary of desired constraints where the constraints (Such as UniqueConstraint) are keys
             and the columns to be constrained is a list of string column names
+
+        Returns:
+            The class mapped to the table
         """
         columns = self._generate_columns(columns)
         if constraints:
@@ -109,7 +155,10 @@ class Database:
                       *columns
                       )
 
-        mapper(self.Template, t)
+        # A fresh class per table avoids clearing every mapper (a global operation) before the next table is mapped
+        tbl_class = type(tbl_name, (self.Template,), {})
+        mapper(tbl_class, t)
+        return tbl_class
 
     @staticmethod
     def _generate_columns(columns):
@@ -119,42 +168,88 @@ class Database:
         elements of the list"""
         column_list = []
         for col_name, args in columns.items():
-            try:
-                kwargs = []
-                for idx in range(len(args)):
-                    if type(args[idx]) is dict:
-                        kwargs.append(args[idx])
-                        args.pop(idx)
-                col = Column(col_name, *args)
-                for kwarg in kwargs:
-                    keys = [*kwarg]
-                    if len(keys) > 1:
-                        raise Exception('Expected 1 key, {} were given'.format(len(keys)))
-                    else:
-                        key = keys[0]
-                    col.__setattr__(key, kwarg[key])
-                column_list.append(col)  # Unpacks additional column arguments
-            except TypeError:  # if no additional arguments, just make a standard name and type column
+            if not isinstance(args, (list, tuple)):  # if no additional arguments, make a standard name and type column
                 column_list.append(Column(col_name, args))
+                continue
+            kwargs = [arg for arg in args if type(arg) is dict]
+            # Unpacks additional column arguments
+            col = Column(col_name, *[arg for arg in args if type(arg) is not dict])
+            for kwarg in kwargs:
+                keys = [*kwarg]
+                if len(keys) > 1:
+                    raise Exception('Expected 1 key, {} were given'.format(len(keys)))
+                else:
+                    key = keys[0]
+                col.__setattr__(key, kwarg[key])
+            column_list.append(col)
         return column_list
 
     @staticmethod
     def clear_mappers():
+        """Clear all SQLalchemy mappers, freeing Template for new tables.
+
+        This also unmaps the classes behind each Database's cached table_mappings, which are rebuilt on next access.
+        """
         clear_mappers()
 
     def drop_table(self, drop_tbl):
         """Drops the specified table from the database.
 
+        Does nothing if the table does not exist.
+
         Note: If the database uses SQLite, tables with foreign key constraints cannot be dropped. """
-        self.metadata.reflect(bind=self.engine)
-        drop_tbls = self.metadata.tables[drop_tbl]
-        drop_tbls.drop()
-        self.metadata = MetaData(bind=self.engine)  # Updates the metadata to reflect changes
+        # DROP TABLE needs only the table's name, so the table is not reflected
+        Table(drop_tbl, MetaData()).drop(self.engine, checkfirst=True)
+        if drop_tbl in self.metadata.tables:  # Updates the metadata to reflect changes
+            self.metadata.remove(self.metadata.tables[drop_tbl])
+        self.clear_table_cache()
+
+
+def _is_mapped(cls):
+    """Return True if cls is mapped by SQLalchemy's mapper"""
+    return inspect(cls, raiseerr=False) is not None
 
 
 @event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
     """SQLalchemy listener function to allow foreign keys in SQLite"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
     cursor.close()
+
+
+def set_sqlite_performance_pragmas(dbapi_connection, connection_record):
+    """SQLalchemy listener function to speed up inserts into SQLite databases created by Database
+
+    Write-ahead logging with synchronous=NORMAL syncs to disk at checkpoints rather than on every commit. A commit may
+    be lost on power failure, but the database cannot be corrupted. Temporary tables and indices are held in memory and
+    the page cache is raised to 64MB.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.close()
+
+
+def disable_pysqlite_transactions(dbapi_connection, connection_record):
+    """SQLalchemy listener function to stop pysqlite from managing transactions on connections created by Database
+
+    pysqlite only begins transactions before INSERT, UPDATE, and DELETE statements, so DDL such as CREATE TABLE would
+    commit statement by statement. begin_sqlite_transaction() emits BEGIN in its place.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    dbapi_connection.isolation_level = None
+
+
+def begin_sqlite_transaction(conn):
+    """SQLalchemy listener function to emit BEGIN when SQLalchemy begins a transaction on a Database's connection"""
+    if not isinstance(conn.connection.connection, sqlite3.Connection):
+        return
+    conn.execute("BEGIN")
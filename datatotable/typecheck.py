@@ -2,8 +2,18 @@
 Contains type checks and type conversion functions
 """
 
+from collections.abc import Sequence
 from datetime import datetime, date
 from enum import Enum
+from itertools import islice
+import numpy
+
+# Lists shorter than this are coerced faster in python than the cost of building a numpy array
+_VECTORIZE_MIN_LENGTH = 64
+
+# The type _get_type() returns for each built-in class, looked up by identity so no isinstance/MRO walk is needed.
+# bool is an int subclass and is checked as an int first, so bools are ints.
+_EXACT_TYPES = {int: int, float: float, datetime: datetime, date: date, str: str, bool: int, type(None): None}
 
 
 def set_type(values, new_type):
@@ -22,16 +32,44 @@ def set_type(values, new_type):
     if new_type == str:
         coerced_values = [str(x) for x in values]
     elif new_type == int or new_type == float:
-        float_values = [float(x) for x in values]
-        if new_type == int:
-            coerced_values = [int(round(x)) for x in float_values]
+        numeric_values = _to_numeric_array(values)
+        if numeric_values is not None:
+            if new_type == int:
+                # numpy.rint, like round(), rounds halves to even. Writing into an int64 buffer rounds and casts in
+                # one pass without an intermediate float array.
+                int_values = numpy.empty(numeric_values.size, dtype=numpy.int64)
+                numpy.rint(numeric_values, out=int_values, casting="unsafe")
+                coerced_values = int_values.tolist()
+            else:
+                coerced_values = numeric_values.tolist()
         else:
-            coerced_values = float_values
+            float_values = [float(x) for x in values]
+            if new_type == int:
+                coerced_values = [int(round(x)) for x in float_values]
+            else:
+                coerced_values = float_values
     else:
         raise ValueError("{} not supported for coercing types".format(new_type.__name__))
     return coerced_values
 
 
+def _to_numeric_array(values):
+    """Return values as a float array if they can be coerced in a single vectorized call, otherwise return None.
+
+    Only long lists of finite numbers that fit in a 64 bit integer are vectorized. Strings, short lists, and values
+    python would convert differently than numpy (NaN, infinity, or very large integers) are left to the python path.
+    """
+    if not hasattr(values, "__len__") or len(values) < _VECTORIZE_MIN_LENGTH:
+        return None
+    arr = numpy.asarray(values)
+    if arr.dtype.kind not in "iufb" or arr.ndim != 1:
+        return None
+    arr = arr.astype(numpy.float64, copy=False)  # float64 input is used as is; it is never modified
+    if not (numpy.abs(arr) < 2 ** 63).all():  # Also False for NaN and infinity
+        return None
+    return arr
+
+
 def _set_type(values, new_type):
     """Transforms a list of values into the specified new type. If the value has zero length, returns none
 
@@ -52,20 +90,26 @@ def _set_type(values, new_type):
     return new_vals
 
 
-def get_type(values):
+def get_type(values, sample=None):
     """Return the type of the values where type is defined as the modal type in the list.
 
     Args:
         values: A list or value to get the type for.
+        sample: If specified, only the first sample values of a list, and its last value, are inspected. Sampling
+            trades accuracy for speed on large lists: a value of a different type between the sample and the last
+            value will not be seen.
 
     Returns:
-        The modal type of a list or the type of the element. Can be integer, float, string, datetime, or none
+        The modal type of a list or the type of the element. Can be integer, float, string, datetime, or none. A list
+        holding only booleans, or booleans and None, is bool; otherwise booleans count as integers.
     """
     if hasattr(values, "__len__") and (type(values) != type):  # Checks if the object is iterable
-        val_types = []
-        for i in values:
-            val_types.append(_get_type(i))
-        type_set = set(val_types)
+        if sample is not None and len(values) > sample + 1:
+            # The last value is a cheap check on the end of the list, which is often where a stray type shows up
+            # (e.g. a trailing total row or a "N/A" appended by a scraper)
+            last = [values[-1]] if isinstance(values, (Sequence, numpy.ndarray)) else []
+            values = [*islice(values, sample), *last]
+        type_set = _get_type_set(values)
         if len(type_set) == 1:
             return type_set.pop()
         elif len(type_set) == 2 and {None}.issubset(type_set):  # None value allowance
@@ -85,6 +129,51 @@ def get_type(values):
         return _get_type(values)
 
 
+def _get_type_set(values):
+    """Return the set of types, as classified by _get_type(), of the values.
+
+    The distinct classes of the values are collected in C with set(map(type, values)), so only each distinct class,
+    rather than each value, is classified in python.
+
+    Args:
+        values: An iterable of values
+    Returns:
+        A set of the types of the values. Can include int, float, datetime, date, string, bool, or None
+    """
+    classes = set(map(type, values))
+    if type in classes:  # Types passed explicitly as values are classified by value, not by class
+        return {_get_type(i) for i in values}
+    if bool in classes and classes <= {bool, type(None)}:  # Booleans are only ints when mixed with other numbers
+        return {_EXACT_TYPES[cls] if cls is type(None) else bool for cls in classes}
+    return {_get_class_type(cls) for cls in classes}
+
+
+def _get_class_type(cls):
+    """Return the type _get_type() would return for an instance of cls.
+
+    Raise:
+        Exception: An exception raised if cls is not int, float, datetime, date, string, bool, or None's type.
+    """
+    if cls in _EXACT_TYPES:
+        return _EXACT_TYPES[cls]
+    elif issubclass(cls, int):  # Subclasses, such as IntEnum, are resolved in the same order as _get_type()
+        return int
+    elif issubclass(cls, float):
+        return float
+    elif issubclass(cls, datetime):
+        return datetime
+    elif issubclass(cls, date):
+        return date
+    elif issubclass(cls, str):
+        return str
+    elif issubclass(cls, bool):
+        return bool
+    elif cls is type(None):
+        return None
+    else:
+        raise Exception("Val is not an int, float, datetime, string, Bool, or None")
+
+
 def _get_type(val):
     """Return the type of the value if it is a int, float, or datetime. Otherwise, return a string.
 
@@ -95,7 +184,9 @@ def _get_type(val):
     Raise:
         Exception: An exception raised if the val is not int, float, datetime, None, or string.
     """
-    if isinstance(val, int):
+    if type(val) in _EXACT_TYPES:
+        return _EXACT_TYPES[type(val)]
+    elif isinstance(val, int):
         return int
     elif isinstance(val, float):
         return float
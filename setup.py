@@ -15,9 +15,12 @@ setup(
     url="https://github.com/Spencer-Weston/DatatoTable",
     keywords="data SQL sql SQLalchemy web-scraping data-management",
     packages=find_packages(include=['datatotable', 'datatotable.*']),
+    python_requires='>=3.8',
     install_requires=[
                       'SQLAlchemy>=1.2.17',
+                      'numpy',
     ],
+    extras_require={'pandas': ['pandas']},
     setup_requires=['pytest-runner'],
     tests_require=['pytest']
 )
@@ -1,23 +1,37 @@
 import datatotable.convert as convert
-from datatotable.database import Database
+from datatotable.database import Database, set_sqlite_performance_pragmas
 from datatotable.data import DataOperator
 from datatotable import typecheck
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import numpy
+from operator import attrgetter
 import os
 import pytest
-from sqlalchemy import Integer, Float, String, DateTime, UniqueConstraint, ForeignKey
+import sys
+from types import MappingProxyType
+from sqlalchemy import Boolean, Integer, Float, String, DateTime, UniqueConstraint, ForeignKey, event, func
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
+EXPECTED_COLUMNS = {"strings": [String], "ints": [Integer], "floats": [Float], "dates": [DateTime]}
+EXPECTED_ROWS = [{'strings': 'hi', 'ints': 1, 'floats': 1.1, 'dates': datetime(2019, 1, 1)},
+                 {'strings': 'world', 'ints': 2, 'floats': 2.2, 'dates': datetime(2019, 1, 2)},
+                 {'strings': 'bye', 'ints': 3, 'floats': 3.3, 'dates': datetime(2019, 1, 3)},
+                 {'strings': 'school', 'ints': 4, 'floats': 4.4444, 'dates': datetime(2019, 1, 4)}]
+# Equivalent values for typecheck.set_type tests
+FLOATS = [1.1, 2.2, 3.3, 4.6]
+INTS = [1, 2, 3, 5]
+STRINGS = ['1.1', '2.2', '3.3', '4.6']
 
-@pytest.fixture
+
+@pytest.fixture(scope="module")
 def sample_dict_data():
     test_data = {"strings": ["hi", "world", "bye", "school"], "ints": [1, 2, 3, 4],
                  "floats": [1.1, 2.2, 3.3, 4.4444], "dates": [datetime(2019, 1, 1) + timedelta(i) for i in range(4)]}
-    return test_data
+    return MappingProxyType(test_data)  # Shared by every test in the module, so it must not be modified
 
 
-@pytest.fixture()
+@pytest.fixture(scope="module")
 def sample_row_data():
     test_data = [{"strings": 'hi', 'ints': 1, 'floats': 1.1, 'dates': datetime(2019, 1, 1)},
                  {"strings": 'world', 'ints': 2, 'floats': 2.2, 'dates': datetime(2019, 1, 2)},
@@ -26,16 +40,49 @@ def sample_row_data():
     return test_data
 
 
-@pytest.fixture()
+@pytest.fixture(scope="module")
+def sample_data(request):
+    """The sample data in the layout named by the indirect parameter: "dict" for columns or "list" for rows"""
+    return request.getfixturevalue({"dict": "sample_dict_data", "list": "sample_row_data"}[request.param])
+
+
+@pytest.fixture(scope="module")
 def sample_data_operator(sample_dict_data):
     data = DataOperator(sample_dict_data)
     return data
 
 
-@pytest.fixture()
+@pytest.fixture(params=["pandas", "no_pandas"])
+def pandas_installed(request, monkeypatch):
+    """Runs a test with pandas importable and again with its import blocked, as if the optional extra were missing"""
+    if request.param == "no_pandas":
+        monkeypatch.setitem(sys.modules, "pandas", None)
+    return request.param == "pandas"
+
+
+def set_sqlite_test_pragmas(dbapi_connection, connection_record):
+    """SQLalchemy listener function that disables journaling to disk and syncing for the throwaway test database"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+@pytest.fixture(scope="module")
 def session(database):
+    """A single Session shared by the module's tests"""
     session = Session(bind=database.engine)
-    return session
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def rollback_session(request):
+    """Roll back anything a test left uncommitted in the shared session, such as a failed commit's rows"""
+    yield
+    if "session" in request.fixturenames:
+        request.getfixturevalue("session").rollback()
 
 
 class TestTypeCheck:
@@ -48,116 +95,322 @@ class TestTypeCheck:
         assert float == typecheck.get_type(sample_dict_data['floats'])
         assert datetime == typecheck.get_type(sample_dict_data['dates'])
 
-    def test_set_type(self):
+    def test_get_type_sample(self):
+        """Tests that get_type only inspects the first sample values and the last value when a sample size is given"""
+        values = [1, 2, 'three', 4]
+        assert int == typecheck.get_type(values, sample=2)
+        assert str == typecheck.get_type(values, sample=3)
+        assert str == typecheck.get_type(values)
+        assert str == typecheck.get_type([1, 2, 3, 'four'], sample=2)
+
+    @pytest.mark.parametrize("values, expected", [([True, False], bool),
+                                                  ([True, None], bool),
+                                                  ([True, 2], int),
+                                                  ([True, 1.5, None], float)])
+    def test_get_type_bools(self, values, expected):
+        """Tests that booleans are typed as bool unless they are mixed with other numbers"""
+        assert expected == typecheck.get_type(values)
+
+    @pytest.mark.parametrize("values, new_type, expected", [(FLOATS, int, INTS),
+                                                            (FLOATS, str, STRINGS),
+                                                            (INTS, float, [1.0, 2.0, 3.0, 5.0]),
+                                                            (INTS, str, ['1', '2', '3', '5']),
+                                                            (STRINGS, int, INTS),
+                                                            (STRINGS, float, FLOATS)])
+    def test_set_type(self, values, new_type, expected):
         """Tests that the set_type function from typecheck correctly modifies data types"""
-        floats = [1.1, 2.2, 3.3, 4.6]
-        ints = [1, 2, 3, 5]
-        strings = ['1.1', '2.2', '3.3', '4.6']
-        assert ints == typecheck.set_type(floats, int)
-        assert strings == typecheck.set_type(floats, str)
-        assert [1.0 * x for x in ints] == typecheck.set_type(ints, float)
-        assert [str(x) for x in ints] == typecheck.set_type(ints, str)
-        assert ints == typecheck.set_type(strings, int)
-        assert floats == typecheck.set_type(strings, float)
+        assert expected == typecheck.set_type(values, new_type)
+
+    def test_set_type_vectorized(self):
+        """Tests that set_type coerces long numeric lists, which are converted with numpy, as it does short lists"""
+        floats = [i / 2 for i in range(-100, 100)]  # Includes halves, which round to even
+        ints = list(range(100))
+        assert [int(round(x)) for x in floats] == typecheck.set_type(floats, int)
+        assert [float(x) for x in ints] == typecheck.set_type(ints, float)
+        assert all(type(x) is int for x in typecheck.set_type(floats, int))
 
     def test_set_type_errors(self):
         """Tests for correct error raising when data cannot be coerced to an alternate type"""
-        strings = ['1.1', '2.2', '3.3', '4.6']
         with pytest.raises(ValueError):
-            typecheck.set_type(strings, datetime)
+            typecheck.set_type(STRINGS, datetime)
 
 
 class TestDataOperator:
     """Tests functionality in the data.DataOperator class"""
 
-    def test_dict_column_generator(self, sample_dict_data):
-        """Assert that columns reflect the expected SQLalchemy column type when DataOperator is passed a dictionary"""
-        data = DataOperator(sample_dict_data)
-        columns = data.columns
-        assert columns['strings'] == [String], "Incorrect SQLalchemy type returned by DataOperator.columns"
-        assert columns['ints'] == [Integer], "Incorrect SQLalchemy type returned by DataOperator.columns"
-        assert columns['floats'] == [Float], "Incorrect SQLalchemy type returned by DataOperator.columns"
-        assert columns['dates'] == [DateTime], "Incorrect SQLalchemy type returned by DataOperator.columns"
-
-    def test_dict_row_generator(self, sample_dict_data):
-        """Assert that rows are correctly formatted into a list of dictionaries when DataOperator is passed a dict"""
-        data = DataOperator(sample_dict_data)
+    @pytest.mark.parametrize("sample_data", ["dict", "list"], indirect=True)
+    def test_column_generator(self, sample_data, pandas_installed):
+        """Assert that columns reflect the expected SQLalchemy column types for dictionary and list input"""
+        data = DataOperator(sample_data)
+        assert data.columns == EXPECTED_COLUMNS, "Incorrect SQLalchemy type returned by DataOperator.columns"
+
+    @pytest.mark.parametrize("sample_data", ["dict", "list"], indirect=True)
+    def test_row_generator(self, sample_data):
+        """Assert that rows are correctly formatted into a list of dictionaries for dictionary and list input"""
+        data = DataOperator(sample_data)
         rows = data.rows
         assert isinstance(rows, list)
-        assert rows[0] == {'strings': 'hi', 'ints': 1, 'floats': 1.1, 'dates': datetime(2019, 1, 1)}
-        assert rows[1] == {'strings': 'world', 'ints': 2, 'floats': 2.2, 'dates': datetime(2019, 1, 2)}
-        assert rows[2] == {'strings': 'bye', 'ints': 3, 'floats': 3.3, 'dates': datetime(2019, 1, 3)}
-        assert rows[3] == {'strings': 'school', 'ints': 4, 'floats': 4.4444, 'dates': datetime(2019, 1, 4)}
-
-    def test_list_column_generator(self, sample_row_data):
-        """Assert that columns reflect the expected SQLalchemy column type when DataOperator is passed a list"""
-        data = DataOperator(sample_row_data)
-        columns = data.columns
-        assert columns['strings'] == [String], "Incorrect SQLalchemy type returned by DataOperator.columns"
-        assert columns['ints'] == [Integer], "Incorrect SQLalchemy type returned by DataOperator.columns"
-        assert columns['floats'] == [Float], "Incorrect SQLalchemy type returned by DataOperator.columns"
-        assert columns['dates'] == [DateTime], "Incorrect SQLalchemy type returned by DataOperator.columns"
-
-    def test_list_row_generator(self, sample_row_data):
-        """Assert that rows are correctly formatted into a list of dictionaries when DataOperator is passed a list"""
-        data = DataOperator(sample_row_data)
+        assert rows == EXPECTED_ROWS
+
+    @pytest.mark.parametrize("sample_data", ["dict", "list"], indirect=True)
+    @pytest.mark.parametrize("batch_size", [1, 3, 10])
+    def test_iter_rows(self, sample_data, batch_size):
+        """Assert that iter_rows yields the rows in order as lists of at most batch_size rows"""
+        data = DataOperator(sample_data)
+        batches = list(data.iter_rows(batch_size))
+        assert all(0 < len(batch) <= batch_size for batch in batches)
+        assert [row for batch in batches for row in batch] == EXPECTED_ROWS
+
+    def test_dataframe_input(self, sample_dict_data):
+        """Assert that a pandas DataFrame is accepted as input and produces the same columns and rows as a dictionary"""
+        pandas = pytest.importorskip("pandas")
+        data = DataOperator(pandas.DataFrame(dict(sample_dict_data)))
+        assert data.columns == EXPECTED_COLUMNS
+        assert data.rows == EXPECTED_ROWS
+        assert all(type(row["dates"]) is datetime for row in data.rows), "Rows hold pandas Timestamps"
+
+    def test_dataframe_missing_values(self):
+        """Assert that NaT and NA in a DataFrame, including nullable dtypes, become None and keep the column types"""
+        pandas = pytest.importorskip("pandas")
+        frame = pandas.DataFrame({"dates": pandas.to_datetime(["2019-01-01", None]),
+                                  "bools": pandas.array([True, None], dtype="boolean"),
+                                  "ints": pandas.array([1, None], dtype="Int64")})
+        data = DataOperator(frame)
+        assert data.columns == {"dates": [DateTime], "bools": [Boolean], "ints": [Integer]}
+        assert data.rows[1] == {"dates": None, "bools": None, "ints": None}
+        assert type(data.rows[0]["dates"]) is datetime
+
+    @pytest.mark.parametrize("values, sql_type", [([2 ** 63, -1], Integer),
+                                                  ([2 ** 64, 1], Integer),
+                                                  ([True, 2], Integer),
+                                                  ([1, 2, 1.5], Float)])
+    def test_mixed_numeric_column(self, values, sql_type):
+        """Assert that numbers numpy cannot hold in one dtype, such as ints above int64, keep their exact values"""
+        data = DataOperator({"numbers": values})
+        assert data.columns == {"numbers": [sql_type]}
+        row_values = [row["numbers"] for row in data.rows]
+        assert row_values == values and list(map(type, row_values)) == list(map(type, values))
+
+    def test_datetime64_column(self):
+        """Assert that a numpy datetime64 column is a DateTime column whose rows hold datetimes, with NaT as None"""
+        data = DataOperator({"dates": numpy.array(["2019-01-01T12:30", "NaT"], dtype="datetime64[ns]")})
+        assert data.columns == {"dates": [DateTime]}
+        assert data.rows == [{"dates": datetime(2019, 1, 1, 12, 30)}, {"dates": None}]
+
+    def test_rows_without_keys(self):
+        """Assert that rows without keys produce an empty DataOperator"""
+        data = DataOperator([{}, {}])
+        assert data.data == {} and data.columns == {} and data.rows == []
+
+    @pytest.mark.parametrize("values", [[True, False, True], [True, False, None]])
+    def test_bool_column(self, values, pandas_installed):
+        """Assert that a column holding only booleans, or booleans and None, is a Boolean column and keeps its values"""
+        data = DataOperator({"bools": values})
+        assert data.columns == {"bools": [Boolean]}
+        assert [row["bools"] for row in data.rows] == values
+
+    @pytest.mark.parametrize("int_dtype", [numpy.int8, numpy.int32, numpy.int64])
+    @pytest.mark.parametrize("float_dtype", [numpy.float32, numpy.float64])
+    def test_column_generator_dtypes(self, int_dtype, float_dtype):
+        """Assert that numpy columns of any integer or float width are typed from their dtype and keep their dtype"""
+        data = DataOperator({"i": numpy.arange(100, dtype=int_dtype), "f": numpy.arange(100, dtype=float_dtype)})
+        assert data.columns == {"i": [Integer], "f": [Float]}
+        assert data.data["i"].dtype == int_dtype and data.data["f"].dtype == float_dtype  # Not upcast to object
+        assert data.rows[-1] == {"i": 99, "f": 99.0}
+
+    @pytest.mark.parametrize("values", [[datetime(2019, 1, 1, 12, 30), date(2019, 1, 2)],
+                                        [1, float("nan"), None],
+                                        [datetime(2019, 1, 1), float("nan")]])
+    def test_mixed_column_types(self, values, pandas_installed):
+        """Assert that mixed columns are typed as typecheck.get_type types them, whether or not pandas is installed"""
+        assert DataOperator({"mixed": values})._get_py_type() == {"mixed": typecheck.get_type(values)}
+
+    def test_dataframe_requires_pandas(self, sample_dict_data, monkeypatch):
+        """Assert that only the dataframe property needs pandas, and that it raises ImportError without it"""
+        monkeypatch.setitem(sys.modules, "pandas", None)
+        data = DataOperator(sample_dict_data)
+        assert data.columns == EXPECTED_COLUMNS and data.rows == EXPECTED_ROWS
+        with pytest.raises(ImportError):
+            data.dataframe
+
+    def test_infer_sample(self):
+        """Assert that column types are inferred from only the first infer_sample values when it is specified"""
+        data = {"mixed": [1, 2, "three", 4]}
+        assert DataOperator(data, infer_sample=2).columns == {"mixed": [Integer]}
+        assert DataOperator(data).columns == {"mixed": [String]}
+
+    def test_cached_properties(self):
+        """Assert that rows are computed once and recomputed, with the column types, after fill() modifies the data"""
+        data = DataOperator({"ints": [1, 2], "nulls": [None]})
         rows = data.rows
-        assert isinstance(rows, list)
-        assert rows[0] == {'strings': 'hi', 'ints': 1, 'floats': 1.1, 'dates': datetime(2019, 1, 1)}
-        assert rows[1] == {'strings': 'world', 'ints': 2, 'floats': 2.2, 'dates': datetime(2019, 1, 2)}
-        assert rows[2] == {'strings': 'bye', 'ints': 3, 'floats': 3.3, 'dates': datetime(2019, 1, 3)}
-        assert rows[3] == {'strings': 'school', 'ints': 4, 'floats': 4.4444, 'dates': datetime(2019, 1, 4)}
+        assert data.rows is rows, "DataOperator.rows was recomputed on a second access"
+        assert "nulls" not in data.columns  # No column is created for null values
+        data.fill("nulls", "filler")
+        assert data.rows == [{"ints": 1, "nulls": None}, {"ints": 2, "nulls": "filler"}]
+        assert data.columns["nulls"] == [String]
+
+    @pytest.mark.parametrize("value", [0, 2.5, "filler", (1, 2), [1, 2]])
+    def test_fill(self, value):
+        """Assert that fill() extends a short column with the value, storing sequences whole rather than broadcasting"""
+        data = DataOperator({"ints": [1, 2, 3], "short": [None]})
+        data.fill("short", value)
+        assert [row["short"] for row in data.rows] == [None, value, value]
+
+    def test_columns_cached(self, sample_data_operator):
+        """Assert that column types are inferred once while columns still returns copies that callers can extend"""
+        sql_types = sample_data_operator._sql_types
+        assert sample_data_operator._sql_types is sql_types, "Column types were inferred on a second access"
+        columns = sample_data_operator.columns
+        assert columns == sample_data_operator.columns == EXPECTED_COLUMNS
+        assert columns is not sample_data_operator.columns
+        columns["ints"].append("extra")  # e.g. a ForeignKey appended by a caller
+        assert sample_data_operator.columns == EXPECTED_COLUMNS
 
 
 class TestDatabase:
     """"Tests functionality of the database.Database class."""
 
     @pytest.fixture(autouse=True, scope="session")
-    def database(self, tmpdir_factory):
-        """Generates a Database object named 'test.db' in the tmpdir"""
-        yield Database("test", tmpdir_factory.mktemp("tempDB"))
+    def database(self, tmp_path_factory):
+        """Generates a Database object named 'test.db' in a temporary directory
+
+        The directory is discarded after the session, so durability is traded for speed: the engine's WAL pragmas are
+        replaced with an in-memory journal and no syncing to disk."""
+        database = Database("test", tmp_path_factory.mktemp("tempDB"))
+        event.remove(database.engine, "connect", set_sqlite_performance_pragmas)
+        event.listen(database.engine, "connect", set_sqlite_test_pragmas)
+        yield database
+
+    @pytest.fixture(autouse=True, scope="module")
+    def tables(self, database, sample_data_operator):
+        """Maps every table the tests use from the sample_data_operator's columns and creates them all at once"""
+        columns = sample_data_operator.columns
+        child_cols = DataOperator({"fk_id": [1, 22]}).columns
+        child_cols['fk_id'].append(ForeignKey('parent_tbl.id'))
+        tables = [("sample_tbl", columns, None),
+                  ("unique_tbl", columns, [UniqueConstraint('strings')]),
+                  ("parent_tbl", columns, None),
+                  ("child_tbl", child_cols, None)]
+        for tbl_name, tbl_columns, constraints in tables:
+            database.map_table(tbl_name, tbl_columns, constraints)
+        database.create_tables()
 
     def test_db_exists(self, database):
         """Tests if the database exists."""
-        database.create_tables()  # Arbitrary blank call to the database creates a connection and the database file
-        database.clear_mappers()
         assert os.path.exists(database.path), "Database does not exist"
 
-    def test_tbl_creation(self, database, sample_data_operator):
+    def test_performance_pragmas(self, tmp_path):
+        """Test if a Database's connections use the WAL journal and NORMAL synchronous mode."""
+        database = Database("pragma_test", tmp_path)
+        with database.engine.connect() as conn:
+            assert conn.execute("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.execute("PRAGMA synchronous").scalar() == 1  # NORMAL
+            assert conn.execute("PRAGMA cache_size").scalar() == -65536
+
+    def test_engine_kwargs(self, tmp_path):
+        """Tests if keyword arguments are passed through to the engine."""
+        assert Database("kwargs_test", tmp_path, echo=True).engine.echo is True
+
+    def test_tbl_creation(self, database):
         """Tests if a table is created after extracting columns from the sample_data_operator."""
-        data = sample_data_operator
-        columns = data.columns
-        database.map_table("sample_tbl", columns)
-        database.create_tables()
-        database.clear_mappers()
         assert database.table_exists("sample_tbl")
 
     def test_tbl_insertion(self, database, session, sample_data_operator):
-        """Test if data is correctly inserted after extracting rows from the sample_data_operator."""
+        """Test if every row is correctly inserted after extracting rows from the sample_data_operator."""
         data = sample_data_operator
         rows = data.rows
+        database.insert_rows("sample_tbl", rows)
         tbl_map = database.table_mappings["sample_tbl"]
-        tbl_map_rows = [tbl_map(**row) for row in rows]
-        session.add_all(tbl_map_rows)
-        session.commit()
-        test_query = session.query(tbl_map).filter(tbl_map.strings == "hi").all()[0]
+        assert session.query(tbl_map).count() == len(rows)
+        test_query = session.query(tbl_map).filter_by(strings="hi").first()
         row_dict = {key: value[0] for (key, value) in data.data.items()}
-        test_dict = {key: test_query.__getattribute__(key) for key in data.data.keys()}
+        keys = tuple(data.data.keys())
+        test_dict = dict(zip(keys, attrgetter(*keys)(test_query)))
         assert row_dict == test_dict
 
+    def test_dataframe_insertion(self, database, session):
+        """Test if a DataFrame with missing values is inserted with NULL in place of NaT and NA."""
+        pandas = pytest.importorskip("pandas")
+        frame = pandas.DataFrame({"dates": pandas.to_datetime(["2019-01-01", None]),
+                                  "bools": pandas.array([True, None], dtype="boolean"),
+                                  "ints": pandas.array([1, None], dtype="Int64")})
+        data = DataOperator(frame)
+        database.map_table("frame_tbl", data.columns)
+        database.create_tables()
+        database.insert_rows("frame_tbl", data.rows)
+        tbl = database.tables["frame_tbl"]
+        stored = session.query(tbl.c.dates, tbl.c.bools, tbl.c.ints).order_by(tbl.c.id).all()
+        assert stored == [(datetime(2019, 1, 1), True, 1), (None, None, None)]
+
+    @pytest.mark.parametrize("num_rows", [1000, 10000])
+    def test_bulk_insert(self, database, session, num_rows):
+        """Test if insert_rows inserts thousands of rows in a single executemany call."""
+        tbl_name = "bulk_tbl_{}".format(num_rows)
+        data = DataOperator({"i": list(range(num_rows)), "s": ["r{}".format(i) for i in range(num_rows)]})
+        database.map_table(tbl_name, data.columns)
+        database.create_tables()
+        database.insert_rows(tbl_name, data.rows)
+        assert session.query(func.count()).select_from(database.tables[tbl_name]).scalar() == num_rows
+
+    def test_create_tables_single_commit(self, database):
+        """Test if create_tables creates every new table in a single transaction rather than committing per table."""
+        commits = 0
+        creates_in_transaction = []
+
+        def count_commits(conn):
+            nonlocal commits
+            commits += 1
+
+        def record_transaction(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().startswith("CREATE TABLE"):
+                creates_in_transaction.append(cursor.connection.in_transaction)
+
+        for i in range(3):
+            database.map_table("commit_tbl_{}".format(i), {"i": [Integer]})
+        event.listen(database.engine, "commit", count_commits)
+        event.listen(database.engine, "before_cursor_execute", record_transaction)
+        try:
+            database.create_tables()
+        finally:
+            event.remove(database.engine, "commit", count_commits)
+            event.remove(database.engine, "before_cursor_execute", record_transaction)
+        assert all(database.table_exists("commit_tbl_{}".format(i)) for i in range(3))
+        assert creates_in_transaction == [True, True, True], "pysqlite ran a CREATE TABLE outside a transaction"
+        assert commits == 1
+
+    def test_bulk_insert_streams_batches(self, database, session):
+        """Test if insert_rows consumes a generator one batch at a time rather than materializing every row."""
+        num_rows, batch_size = 50000, 10000
+        produced = 0
+        produced_per_execute = []
+
+        def rows():
+            nonlocal produced
+            for i in range(num_rows):
+                produced += 1
+                yield {"i": i}
+
+        def record_produced(conn, cursor, statement, parameters, context, executemany):
+            if executemany:  # Ignores the single statements used to reflect the table
+                produced_per_execute.append(produced)
+
+        database.map_table("stream_tbl", {"i": [Integer]})
+        database.create_tables()
+        event.listen(database.engine, "before_cursor_execute", record_produced)
+        try:
+            database.insert_rows("stream_tbl", rows(), batch_size=batch_size)
+        finally:
+            event.remove(database.engine, "before_cursor_execute", record_produced)
+        assert produced_per_execute == [batch_size * (i + 1) for i in range(num_rows // batch_size)]
+        assert session.query(func.count()).select_from(database.tables["stream_tbl"]).scalar() == num_rows
+
     def test_tbl_creation_constraints(self, database, session, sample_data_operator):
         """Test if a unique constraint is attached to unique table by inserting duplicate data."""
         data = sample_data_operator
-        columns = data.columns
-        constraints = [UniqueConstraint('strings')]
-        database.map_table("unique_tbl", columns, constraints)
-        database.create_tables()
-        database.clear_mappers()
         assert database.table_exists('unique_tbl')
 
+        database.insert_rows("unique_tbl", data.rows)
         tbl_map = database.table_mappings["unique_tbl"]
-        session.add_all([tbl_map(**row) for row in data.rows])
-        session.commit()
         non_unique_row = tbl_map(**{'strings': 'hi', 'ints': 1, 'floats': 1.1, 'dates': datetime.now()})
         session.add(non_unique_row)
         with pytest.raises(IntegrityError):
@@ -165,22 +418,9 @@ class TestDatabase:
 
     def test_foreign_key_constraints(self, database, session, sample_data_operator):
         """Test if foreign key constraints work by inserting expected data then raising an error on invalid data."""
-        parent_cols = sample_data_operator.columns
-        database.map_table("parent_tbl", parent_cols)
-        database.create_tables()
-        database.clear_mappers()
-        parent_tbl = database.table_mappings["parent_tbl"]
-        parent_rows = sample_data_operator.rows
-        session.add_all([parent_tbl(**row) for row in parent_rows])
-        session.commit()
+        database.insert_rows("parent_tbl", sample_data_operator.rows)
 
         child_data = DataOperator({"fk_id": [1, 22]})
-        child_cols = child_data.columns
-        child_cols['fk_id'].append(ForeignKey('parent_tbl.id'))
-        database.map_table('child_tbl', child_cols)
-        database.create_tables()
-        database.clear_mappers()
-
         child_tbl = database.table_mappings['child_tbl']
         rows = child_data.rows
         # inserts '1' which exists in sample_tbl.id. Should not raise an error
@@ -219,6 +459,16 @@ class TestDatabase:
         child_row_count = session.query(child_tbl).count()
         assert child_row_count == 1
 
+    def test_clear_mappers(self, tmp_path):
+        """Test if clear_mappers can be called on the class and cached table mappings are rebuilt afterwards."""
+        database = Database("mappers_test", tmp_path)
+        database.map_table("mapped_tbl", {"i": [Integer]})
+        database.create_tables()
+        mapped_cls = database.table_mappings["mapped_tbl"]
+        Database.clear_mappers()
+        assert database.table_mappings["mapped_tbl"] is not mapped_cls
+        assert Session(bind=database.engine).query(database.table_mappings["mapped_tbl"]).count() == 0
+
     def test_drop_tbl(self, database):
         """Test if tables are dropped correctly."""
         database.drop_table('unique_tbl')